@@ -1,87 +1,379 @@
 # app.py
 import os
-import json
+import re
+import shutil
+import hashlib
+import tempfile
+import time
+import importlib
+import threading
+import logging
 import zipfile
 from io import BytesIO
 from datetime import datetime
+from functools import lru_cache
 from itertools import cycle
 
 import pandas as pd
-import plotly.express as px
 import streamlit as st
 
 from main import run_analysis
+from tools.semantic_cache import SemanticCache, canonical_key, exact_fields
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback; same results, slower
+    import json
+    orjson = None
+
+logger = logging.getLogger("MarketMind")
 
 OUTPUT_DIR = "outputs"
+EXACT_CACHE_DIR = os.path.join("cache", "exact")
+EXACT_CACHE_MAX_ENTRIES = int(os.getenv("EXACT_CACHE_MAX_ENTRIES", "500"))
+
+# Artifact names written by run_analysis (looked up in the per-rerun outputs snapshot)
+PRICES_FILE = "competitor_prices.json"
+SCORES_FILE = "feature_scores.json"
+GROWTH_FILE = "market_growth.json"
+SENTIMENT_FILE = "sentiment_metrics.json"
+REVIEW_MD_FILE = "review_sentiment.md"
+FEATURE_TABLE_MD_FILE = "feature_comparison.md"
+
+# UI bookkeeping, not an analysis artifact: "_" files are skipped by the zip and caches
+SESSION_FILE = os.path.join(OUTPUT_DIR, "_session.json")
+SESSION_MAX_AGE_SECS = 24 * 3600
+# min seconds between live re-renders of the streamed strategy report
+REPORT_STREAM_INTERVAL_SECS = 0.25
 
 # ----------------------------
 # Helpers
 # ----------------------------
+def _json_loads(data: bytes):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+def _json_dumps(obj, sort_keys: bool = False) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else None)
+    # compact + unescaped, byte-identical to orjson so exact-cache keys don't change
+    return json.dumps(obj, sort_keys=sort_keys, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+@st.cache_resource(show_spinner=False)
 def ensure_outputs_dir():
+    # once per process; run_analysis/restore_outputs recreate the dir if it is removed later
     os.makedirs(OUTPUT_DIR, exist_ok=True)
+    return OUTPUT_DIR
 
-def safe_load_json(path: str):
+# Streamlit reruns the whole script on every interaction; file loads are cached on
+# (path, (mtime, size)) so they only hit disk again after run_analysis rewrites the file;
+# size catches rewrites that land within the filesystem's mtime granularity.
+@st.cache_data(show_spinner=False)
+def _load_json(path: str, stamp: tuple):
     try:
-        if not os.path.exists(path):
-            return None
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(path, "rb") as f:
+            return _json_loads(f.read())
     except Exception:
         return None
 
-def safe_read_text(path: str):
+@st.cache_data(show_spinner=False)
+def _read_text(path: str, stamp: tuple):
     try:
-        if not os.path.exists(path):
-            return None
         with open(path, "r", encoding="utf-8") as f:
             return f.read()
     except Exception:
         return None
 
-def parse_csv_list(text: str):
-    items = []
-    for part in (text or "").replace("\n", ",").split(","):
-        p = part.strip()
-        if p:
-            items.append(p)
-
-    seen = set()
-    out = []
-    for x in items:
-        k = x.lower()
-        if k not in seen:
-            out.append(x)
-            seen.add(k)
-    return out
-
-def to_float(x):
+def outputs_snapshot() -> dict:
+    """{filename: (mtime, size)} for outputs/, from one scandir; taken once per rerun after any run."""
     try:
-        return float(x)
-    except Exception:
+        with os.scandir(OUTPUT_DIR) as it:
+            stamps = {}
+            for e in it:
+                if e.is_file():
+                    st_ = e.stat()
+                    stamps[e.name] = (st_.st_mtime, st_.st_size)
+            return stamps
+    except OSError:
+        return {}
+
+def load_output_json(snapshot: dict, name: str):
+    stamp = snapshot.get(name)
+    return None if stamp is None else _load_json(os.path.join(OUTPUT_DIR, name), stamp)
+
+def read_output_text(snapshot: dict, name: str):
+    stamp = snapshot.get(name)
+    return None if stamp is None else _read_text(os.path.join(OUTPUT_DIR, name), stamp)
+
+_CSV_SPLIT = re.compile(r"[,\r\n]+")
+
+@lru_cache(maxsize=64)
+def _parse_csv_tuple(text: str):
+    # single pass; case-insensitive dedupe keeping the first spelling + order
+    parts = (p.strip() for p in _CSV_SPLIT.split(text or ""))
+    seen = {}
+    for p in parts:
+        if p:
+            seen.setdefault(p.lower(), p)
+    return tuple(seen.values())
+
+def parse_csv_list(text: str):
+    return list(_parse_csv_tuple(text or ""))
+
+def prefer_parquet(snapshot: dict, json_name: str):
+    """
+    (path, stamp) of the typed .parquet twin written by run_analysis when it is at least
+    as fresh as the JSON, else of the JSON itself.
+    """
+    pq_name = os.path.splitext(json_name)[0] + ".parquet"
+    pq_mtime = snapshot.get(pq_name, (-1, 0))[0]
+    name = pq_name if pq_mtime >= snapshot.get(json_name, (0, 0))[0] else json_name
+    return os.path.join(OUTPUT_DIR, name), snapshot.get(name, (0.0, 0))
+
+def _selection_dtype(values) -> pd.CategoricalDtype:
+    """
+    Categorical restricted to the user's selection: casting maps any other value to NaN,
+    so one dropna replaces the isin filter (categories keep the selection order).
+    """
+    return pd.CategoricalDtype(categories=list(dict.fromkeys(values)))
+
+@st.cache_data(show_spinner=False)
+def build_price_df(path: str, stamp: tuple, allowed: tuple):
+    if path.endswith(".parquet"):
+        # column projection: the source urls are never read off disk
+        df_price = pd.read_parquet(path, columns=["name", "price"])
+    else:
+        prices_json = _load_json(path, stamp) or {}
+        rows = [r for r in prices_json.get("prices", []) if isinstance(r, dict)]
+        # fixed schema: only the two plotted fields, no per-key column inference
+        df_price = pd.DataFrame.from_records(rows, columns=["name", "price"])
+
+    if not df_price.empty:
+        df_price = df_price.rename(columns={"name": "Competitor", "price": "Price"})
+        df_price["Price"] = pd.to_numeric(df_price["Price"], errors="coerce", downcast="float")
+        df_price["Competitor"] = df_price["Competitor"].astype(_selection_dtype(allowed))
+        df_price = df_price.dropna(subset=["Competitor", "Price"])
+
+    return df_price
+
+SCORE_COLUMNS = ("product", "feature", "score")
+
+@st.cache_data(show_spinner=False)
+def build_scores_df(path: str, stamp: tuple, products: tuple, features: tuple):
+    """Normalized + filtered scores. Returned unfiltered when required columns are missing."""
+    if path.endswith(".parquet"):
+        # written by run_analysis with this exact lower-case schema; skip the note column
+        df_scores = pd.read_parquet(path, columns=list(SCORE_COLUMNS))
+    else:
+        # normalize keys once per row, then build with a fixed schema (no column inference)
+        rows = [
+            {str(k).strip().lower(): v for k, v in r.items()}
+            for r in (_load_json(path, stamp) or {}).get("scores", [])
+            if isinstance(r, dict)
+        ]
+        if not rows or not set(SCORE_COLUMNS).issubset(set().union(*rows)):
+            return pd.DataFrame(rows)
+        df_scores = pd.DataFrame.from_records(rows, columns=list(SCORE_COLUMNS))
+
+    if not set(SCORE_COLUMNS).issubset(set(df_scores.columns)):
+        return df_scores
+
+    df_scores["score"] = pd.to_numeric(df_scores["score"], errors="coerce", downcast="float")
+    df_scores["product"] = df_scores["product"].astype(_selection_dtype(products))
+    df_scores["feature"] = df_scores["feature"].astype(_selection_dtype(features))
+    df_scores = df_scores.dropna(subset=["product", "feature", "score"])
+    # the model sometimes repeats a (product, feature) pair; plot one point per spoke
+    return df_scores.groupby(["product", "feature"], observed=True, sort=False, as_index=False)["score"].mean()
+
+@st.cache_data(show_spinner=False)
+def build_growth_df(path: str, stamp: tuple):
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path, columns=["year", "growth_percent"])
+        years, growth = df["year"].tolist(), df["growth_percent"].tolist()
+    else:
+        growth_json = _load_json(path, stamp) or {}
+        years = growth_json.get("years", [])
+        growth = growth_json.get("growth_percent", [])
+
+    if not years or not growth or len(years) != len(growth):
         return None
+    # Years stay strings (the axis is categorical and the LLM may emit "2025E");
+    # malformed growth entries become NaN, i.e. a gap in the line.
+    return pd.DataFrame(
+        {
+            "Year": pd.array([str(y) for y in years], dtype="string"),
+            "Demand / Growth (%)": pd.to_numeric(pd.Series(growth), errors="coerce").astype("float32"),
+        }
+    )
+
+def extract_sentiment(metrics) -> tuple:
+    """(positive, negative, neutral) as ints; 0/0/0 before the first analysis."""
+    m = metrics or {}
+    return tuple(int(m.get(k, 0) or 0) for k in ("positive", "negative", "neutral"))
+
+def list_md_files(snapshot: dict):
+    return sorted(n for n in snapshot if n.endswith(".md"))
+
+def _scan_outputs(dir_: str, prefix: str = ""):
+    with os.scandir(dir_) as it:
+        for entry in it:
+            if entry.name.startswith("_"):
+                continue
+            if entry.is_dir():
+                yield from _scan_outputs(entry.path, prefix + entry.name + "/")
+            elif entry.is_file():
+                st_ = entry.stat()
+                yield prefix + entry.name, st_.st_mtime, st_.st_size
+
+def _outputs_signature():
+    """(relpath, mtime, size) per archived file; changes whenever a run rewrites outputs."""
+    try:
+        return tuple(sorted(_scan_outputs(OUTPUT_DIR)))
+    except FileNotFoundError:
+        # caught between publish_outputs' two renames: treat as empty, like outputs_snapshot
+        return ()
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _build_zip(sig: tuple):
+    # sig only keys the cache; it already lists exactly the files to archive
+    mem = BytesIO()
+    # stored, not deflated: a few small JSON/MD files, and deflate was most of the cost
+    with zipfile.ZipFile(mem, mode="w", compression=zipfile.ZIP_STORED) as z:
+        for rel, _, _ in sig:
+            z.write(os.path.join(OUTPUT_DIR, rel), arcname=rel)
+    return mem.getvalue()
 
-def list_md_files():
-    if not os.path.exists(OUTPUT_DIR):
-        return []
-    return sorted([f for f in os.listdir(OUTPUT_DIR) if f.endswith(".md")])
+# Partial reruns where supported (Streamlit >= 1.37); plain function otherwise.
+_fragment = getattr(st, "fragment", None) or (lambda fn: fn)
 
-def make_outputs_zip_bytes():
+@_fragment
+def outputs_download_button(key: str):
+    """
+    Two-step download: the archive is only built once the user asks for it, and the
+    prepared bytes are reused for the session until a run changes outputs/. Runs as a
+    fragment, so clicking "Prepare download" reruns just this widget, not the dashboard.
+    """
     ensure_outputs_dir()
-    mem = BytesIO()
-    with zipfile.ZipFile(mem, mode="w", compression=zipfile.ZIP_DEFLATED) as z:
-        for root, _, files in os.walk(OUTPUT_DIR):
-            for fn in files:
-                full = os.path.join(root, fn)
-                rel = os.path.relpath(full, OUTPUT_DIR)
-                z.write(full, arcname=rel)
-    mem.seek(0)
-    return mem.read()
+    sig = _outputs_signature()
+    prepared = st.session_state.get("zip_bytes")
+    if not prepared or prepared[0] != sig:
+        if not st.button("📦 Prepare download", key=f"prepare_zip_{key}", use_container_width=True):
+            return
+        prepared = (sig, _build_zip(sig))
+        st.session_state["zip_bytes"] = prepared
+    st.download_button(
+        "⬇️ Download outputs (ZIP)",
+        data=prepared[1],
+        file_name="marketmind_outputs.zip",
+        mime="application/zip",
+        use_container_width=True,
+        key=f"download_zip_{key}",
+    )
+
+def exact_cache_dir(payload: dict) -> str:
+    key = hashlib.sha256(_json_dumps(payload, sort_keys=True)).hexdigest()
+    return os.path.join(EXACT_CACHE_DIR, key)
+
+def touch_exact(cache_dir: str):
+    # dir mtime doubles as last-used time for eviction
+    try:
+        os.utime(cache_dir)
+    except OSError:
+        pass
+
+def _evict_exact():
+    """Drop least-recently-used entries past EXACT_CACHE_MAX_ENTRIES (same cap as the semantic tier)."""
+    try:
+        with os.scandir(EXACT_CACHE_DIR) as it:
+            entries = [
+                (e.stat().st_mtime, e.path)
+                for e in it
+                if e.is_dir() and ".tmp" not in e.name
+            ]
+    except OSError:
+        return
+    overflow = len(entries) - EXACT_CACHE_MAX_ENTRIES
+    for _, path in sorted(entries)[:max(overflow, 0)]:
+        shutil.rmtree(path, ignore_errors=True)
+
+def store_exact(cache_dir: str):
+    if os.path.isdir(cache_dir):
+        return  # already stored (e.g. by a concurrent session with the same inputs)
+    # copy to a private temp dir first so an interrupted copy never looks like a cache hit
+    os.makedirs(EXACT_CACHE_DIR, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=os.path.basename(cache_dir) + ".tmp-", dir=EXACT_CACHE_DIR)
+    try:
+        shutil.copytree(OUTPUT_DIR, tmp, ignore=shutil.ignore_patterns("_*"), dirs_exist_ok=True)
+        os.replace(tmp, cache_dir)
+    except OSError:
+        if not os.path.isdir(cache_dir):
+            raise
+        # lost the race: another session stored the same key first
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    _evict_exact()
+
+@st.cache_resource(show_spinner=False)
+def get_semantic_cache():
+    return SemanticCache()
+
+def new_staging_dir() -> str:
+    # sibling of OUTPUT_DIR so the final swap is a same-filesystem rename
+    parent = os.path.dirname(os.path.abspath(OUTPUT_DIR))
+    return tempfile.mkdtemp(prefix=".outputs-staging-", dir=parent)
+
+def publish_outputs(staging: str):
+    """
+    Swap a fully written staging dir in as OUTPUT_DIR (two renames, no per-file deletes);
+    readers never see a half-written or emptied outputs dir. The previous tree is
+    removed in the background.
+    """
+    old = staging + ".old"
+    if os.path.isdir(OUTPUT_DIR):
+        os.replace(OUTPUT_DIR, old)
+    os.replace(staging, OUTPUT_DIR)
+    threading.Thread(target=shutil.rmtree, args=(old,), kwargs={"ignore_errors": True}, daemon=True).start()
+
+def restore_outputs(src_dir: str, dest_dir: str):
+    shutil.copytree(src_dir, dest_dir, dirs_exist_ok=True, ignore=shutil.ignore_patterns("_*"))
+    return sorted(os.path.join(OUTPUT_DIR, f) for f in os.listdir(src_dir) if not f.startswith("_"))
+
+def save_session():
+    state = {k: st.session_state.get(k) for k in ("last_run", "last_files")}
+    try:
+        with open(SESSION_FILE, "wb") as f:
+            f.write(_json_dumps(state))
+    except OSError:
+        pass
+
+def restore_session():
+    """Prime last_run/last_files after a page reload from the previous run's record."""
+    if "last_run" in st.session_state:
+        return
+    try:
+        if datetime.now().timestamp() - os.path.getmtime(SESSION_FILE) > SESSION_MAX_AGE_SECS:
+            return
+        with open(SESSION_FILE, "rb") as f:
+            state = _json_loads(f.read())
+    except (OSError, ValueError):
+        return
+    for k, v in state.items():
+        if v is not None:
+            st.session_state.setdefault(k, v)
 
 # ----------------------------
 # Page + Styles
 # ----------------------------
 st.set_page_config(page_title="MarketMind", page_icon="🧠", layout="wide")
 
+@st.cache_resource(show_spinner=False)
+def warm_imports():
+    # plotly.express is the slowest import; load it off the critical path (once per
+    # process) so it is ready by the time a chart is first built.
+    threading.Thread(target=importlib.import_module, args=("plotly.express",), daemon=True).start()
+    return True
+
+warm_imports()
+
 CUSTOM_CSS = """
 <style>
 /* Layout */
@@ -125,6 +417,7 @@ div[data-testid="stExpander"] details { border-radius: 14px; }
 st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 ensure_outputs_dir()
+restore_session()
 
 # ----------------------------
 # Hero
@@ -153,6 +446,98 @@ MM_PALETTE = [
     "#06B6D4",  # cyan
 ]
 
+SENTIMENT_COLOR_MAP = {
+    "Positive": MM_PALETTE[3],
+    "Negative": MM_PALETTE[1],
+    "Neutral": "#94A3B8",
+}
+
+# ----------------------------
+# Charts
+# ----------------------------
+# Figures are rebuilt only when their (hashable) inputs change; tab switches and
+# unrelated widget reruns skip plotly express. Each builder caches the figure as a
+# plain dict (st.plotly_chart accepts it), so every rerun gets its own copy and no
+# Figure object is shared between sessions.
+@st.cache_data(max_entries=32, show_spinner=False)
+def fig_sentiment(pos: int, neg: int, neu: int, title: str):
+    import plotly.express as px
+
+    # explicit dtypes: skips object inference on the tiny literal frame
+    df_sent = pd.DataFrame(
+        {
+            "Sentiment": pd.array(["Positive", "Negative", "Neutral"], dtype="string"),
+            "Percentage": pd.array([pos, neg, neu], dtype="int16"),
+        }
+    )
+    fig = px.pie(
+        df_sent,
+        names="Sentiment",
+        values="Percentage",
+        hole=0.38,
+        title=title,
+        color="Sentiment",
+        color_discrete_map=SENTIMENT_COLOR_MAP,
+    )
+    fig.update_traces(textinfo="percent+label")
+    return fig.to_dict()
+
+def _hash_frame(df: pd.DataFrame) -> bytes:
+    return pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()
+
+@st.cache_data(max_entries=32, show_spinner=False, hash_funcs={pd.DataFrame: _hash_frame})
+def fig_price(df_price: pd.DataFrame, title: str):
+    import plotly.express as px
+
+    # Build per-competitor colors (cycle palette)
+    color_map = dict(zip(df_price["Competitor"].drop_duplicates(), cycle(MM_PALETTE)))
+
+    fig = px.bar(
+        df_price,
+        x="Competitor",
+        y="Price",
+        title=title,
+        color="Competitor",
+        color_discrete_map=color_map,
+    )
+    # Remove bar labels (hover only)
+    fig.update_traces(texttemplate=None)
+    fig.update_layout(yaxis_title="Price (USD)")
+    return fig.to_dict()
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def fig_radar(rows: tuple, title: str):
+    import plotly.express as px
+
+    df_scores = pd.DataFrame.from_records(list(rows), columns=["product", "feature", "score"])
+    df_scores["score"] = df_scores["score"].astype("float32")
+    fig = px.line_polar(
+        df_scores,
+        r="score",
+        theta="feature",
+        color="product",
+        line_close=True,
+        title=title,
+        color_discrete_sequence=MM_PALETTE,
+    )
+    fig.update_traces(fill="toself", opacity=0.55)
+    return fig.to_dict()
+
+@st.cache_data(max_entries=32, show_spinner=False, hash_funcs={pd.DataFrame: _hash_frame})
+def fig_growth(df_growth: pd.DataFrame, title: str):
+    import plotly.express as px
+
+    fig = px.line(
+        df_growth,
+        x="Year",
+        y="Demand / Growth (%)",
+        markers=True,
+        title=title,
+        color_discrete_sequence=[MM_PALETTE[0]],
+    )
+    fig.update_layout(xaxis=dict(type="category"))
+    return fig.to_dict()
+
 # ----------------------------
 # Sidebar (form)
 # ----------------------------
@@ -185,13 +570,7 @@ with st.sidebar:
     st.markdown("---")
     st.markdown("### 📦 Outputs")
     if os.path.exists(OUTPUT_DIR) and any(os.listdir(OUTPUT_DIR)):
-        st.download_button(
-            "⬇️ Download outputs (ZIP)",
-            data=make_outputs_zip_bytes(),
-            file_name="marketmind_outputs.zip",
-            mime="application/zip",
-            use_container_width=True,
-        )
+        outputs_download_button("sidebar")
         st.caption("Includes JSON + Markdown reports.")
     else:
         st.caption("Run analysis to generate downloadable outputs.")
@@ -199,40 +578,120 @@ with st.sidebar:
 # Parse lists
 competitors_list = parse_csv_list(competitors_raw)
 features_list = parse_csv_list(features_raw)
+# hashable once per rerun: shared cache key for the price and score filters
+selected_products = (product_name, *competitors_list)
 
 # ----------------------------
 # Run Analysis
 # ----------------------------
+run_inputs = {
+    "product_name": product_name,
+    "industry": industry,
+    "geography": geography,
+    "scale": scale,
+    "competitors": sorted(competitors_list),
+    "features": sorted(features_list),
+}
+inputs_hash = hashlib.blake2b(_json_dumps(run_inputs, sort_keys=True), digest_size=16).hexdigest()
+
 if run_btn:
     if len(competitors_list) < 1:
         st.error("Please enter at least 1 competitor.")
+    elif (
+        inputs_hash == st.session_state.get("last_inputs_hash")
+        and _outputs_signature() == st.session_state.get("last_outputs_sig")
+    ):
+        # repeat click: this session's results for these exact inputs are still on disk
+        st.info("These results are already up to date for the current inputs.")
     else:
+        staging = None
         with st.spinner("Running analysis…"):
             try:
-                result = run_analysis(
-                    product_name=product_name,
-                    industry=industry,
-                    geography=geography,
-                    scale=scale,
-                    competitors=competitors_list,
-                    features=features_list,
-                )
+                # cache tiers: exact request (sha256) -> near-identical (semantic) -> LLM run
+                exact_dir = exact_cache_dir(run_inputs)
+                semantic_cache = get_semantic_cache()
+                cache_key = canonical_key(product_name, industry)
+                cache_exact = exact_fields(geography, scale, competitors_list, features_list)
+                cached_dir = exact_dir if os.path.isdir(exact_dir) else None
+                if cached_dir:
+                    touch_exact(exact_dir)
+                else:
+                    cached_dir = semantic_cache.lookup(cache_key, exact=cache_exact)
+                # write into a staging dir and swap it in only once everything is there
+                staging = new_staging_dir()
+                if cached_dir:
+                    # identical / near-identical request: reuse stored artifacts, no LLM calls
+                    files_written = restore_outputs(cached_dir, staging)
+                else:
+                    # stream the final report as it is written instead of a silent spinner
+                    report_placeholder = st.empty()
+                    report_chunks = []
+                    last_render = [0.0]
+
+                    def _on_report_chunk(chunk: str):
+                        # re-render at most ~4x/s: each render resends the whole report
+                        report_chunks.append(chunk)
+                        now = time.monotonic()
+                        if now - last_render[0] >= REPORT_STREAM_INTERVAL_SECS:
+                            last_render[0] = now
+                            report_placeholder.markdown("".join(report_chunks))
+
+                    try:
+                        result = run_analysis(
+                            product_name=product_name,
+                            industry=industry,
+                            geography=geography,
+                            scale=scale,
+                            competitors=competitors_list,
+                            features=features_list,
+                            on_final_chunk=_on_report_chunk,
+                            outputs_dir=staging,
+                        )
+                    finally:
+                        # live preview only; the finished report lives in the Reports tab
+                        report_placeholder.empty()
+                    files_written = [
+                        os.path.join(OUTPUT_DIR, os.path.relpath(p, staging))
+                        for p in result.get("files_written", [])
+                    ]
+                publish_outputs(staging)
+                if not cached_dir:
+                    # only a real LLM run fills the cache tiers; a semantic hit belongs to
+                    # a different request and must not be stored under this exact key.
+                    # Best-effort: outputs are already published, a cache miss later is fine.
+                    try:
+                        semantic_cache.store(cache_key, OUTPUT_DIR, exact=cache_exact)
+                    except Exception as cache_err:
+                        logger.warning("Semantic cache store skipped: %s", cache_err)
+                    try:
+                        store_exact(exact_dir)
+                    except Exception as cache_err:
+                        logger.warning("Exact cache store skipped: %s", cache_err)
                 st.session_state["last_run"] = datetime.utcnow().isoformat()
-                st.session_state["last_files"] = result.get("files_written", [])
-                st.success("✅ Analysis completed successfully")
+                st.session_state["last_files"] = files_written
+                save_session()
+                st.session_state["last_inputs_hash"] = inputs_hash
+                st.session_state["last_outputs_sig"] = _outputs_signature()
+                if cached_dir:
+                    st.success("✅ Loaded results from a previous identical / near-identical analysis")
+                else:
+                    st.success("✅ Analysis completed successfully")
             except Exception as e:
+                if staging and os.path.isdir(staging):
+                    shutil.rmtree(staging, ignore_errors=True)
                 st.error("❌ Error running analysis. Check Render logs for details.")
                 st.exception(e)
 
 # ----------------------------
 # Load Outputs
 # ----------------------------
-prices_json = safe_load_json(os.path.join(OUTPUT_DIR, "competitor_prices.json"))
-scores_json = safe_load_json(os.path.join(OUTPUT_DIR, "feature_scores.json"))
-growth_json = safe_load_json(os.path.join(OUTPUT_DIR, "market_growth.json"))
-sentiment_metrics = safe_load_json(os.path.join(OUTPUT_DIR, "sentiment_metrics.json"))
-review_sent_md = safe_read_text(os.path.join(OUTPUT_DIR, "review_sentiment.md"))
-feature_table_md = safe_read_text(os.path.join(OUTPUT_DIR, "feature_comparison.md"))
+outputs = outputs_snapshot()
+prices_json = load_output_json(outputs, PRICES_FILE)
+scores_json = load_output_json(outputs, SCORES_FILE)
+growth_json = load_output_json(outputs, GROWTH_FILE)
+sentiment_metrics = load_output_json(outputs, SENTIMENT_FILE)
+review_sent_md = read_output_text(outputs, REVIEW_MD_FILE)
+feature_table_md = read_output_text(outputs, FEATURE_TABLE_MD_FILE)
 
 # ----------------------------
 # Tabs
@@ -262,9 +721,7 @@ with tab_overview:
         st.markdown("</div>", unsafe_allow_html=True)
 
     # BEFORE analysis: show 0/0/0
-    pos = int((sentiment_metrics or {}).get("positive", 0) or 0)
-    neg = int((sentiment_metrics or {}).get("negative", 0) or 0)
-    neu = int((sentiment_metrics or {}).get("neutral", 0) or 0)
+    pos, neg, neu = extract_sentiment(sentiment_metrics)
 
     with r1:
         st.markdown("<div class='mm-card'>", unsafe_allow_html=True)
@@ -285,24 +742,8 @@ with tab_overview:
     if not sentiment_metrics:
         st.info("Run the analysis to generate sentiment metrics and the sentiment chart.")
     else:
-        df_sent = pd.DataFrame(
-            {"Sentiment": ["Positive", "Negative", "Neutral"], "Percentage": [pos, neg, neu]}
-        )
-        fig_sent = px.pie(
-            df_sent,
-            names="Sentiment",
-            values="Percentage",
-            hole=0.38,
-            title=f"Sentiment Breakdown for {product_name}",
-            color="Sentiment",
-            color_discrete_map={
-                "Positive": MM_PALETTE[3],
-                "Negative": MM_PALETTE[1],
-                "Neutral": "#94A3B8",
-            },
-        )
-        fig_sent.update_traces(textinfo="percent+label")
-        st.plotly_chart(fig_sent, use_container_width=True)
+        fig_sent = fig_sentiment(pos, neg, neu, f"Sentiment Breakdown for {product_name}")
+        st.plotly_chart(fig_sent, use_container_width=True, key="chart_sentiment")
 
         # IMPORTANT: remove quotes here (keep them only in review_sentiment.md under Reports)
         st.caption("Quotes and source links are included inside **review_sentiment.md** (Reports tab).")
@@ -316,40 +757,20 @@ with tab_pricing:
 
     if not prices_json:
         st.info("Run analysis to generate competitor pricing.")
+    elif not prices_json.get("prices"):
+        # nothing to tabulate: skip the parquet/DataFrame path entirely
+        st.warning("No verified prices found to plot for your selected competitors/product.")
     else:
-        df_price = pd.DataFrame(prices_json.get("prices", []))
-
-        if not df_price.empty:
-            if "name" in df_price.columns:
-                df_price = df_price.rename(columns={"name": "Competitor"})
-            if "price" in df_price.columns:
-                df_price = df_price.rename(columns={"price": "Price"})
-
-            df_price["Price"] = df_price["Price"].apply(to_float)
-            df_price = df_price.dropna(subset=["Competitor", "Price"])
-
-            allowed = set([product_name] + competitors_list)
-            df_price = df_price[df_price["Competitor"].isin(allowed)]
+        prices_path, prices_stamp = prefer_parquet(outputs, PRICES_FILE)
+        df_price = build_price_df(prices_path, prices_stamp, selected_products)
 
         if df_price.empty:
             st.warning("No verified prices found to plot for your selected competitors/product.")
         else:
-            # Build per-competitor colors (cycle palette)
-            pal = cycle(MM_PALETTE)
-            color_map = {name: next(pal) for name in df_price["Competitor"].unique().tolist()}
-
-            fig_price = px.bar(
-                df_price,
-                x="Competitor",
-                y="Price",
-                title=f"Pricing (USD) — {product_name} vs competitors",
-                color="Competitor",
-                color_discrete_map=color_map,
+            fig = fig_price(
+                df_price[["Competitor", "Price"]], f"Pricing (USD) — {product_name} vs competitors"
             )
-            # Remove bar labels (hover only)
-            fig_price.update_traces(texttemplate=None)
-            fig_price.update_layout(yaxis_title="Price (USD)")
-            st.plotly_chart(fig_price, use_container_width=True)
+            st.plotly_chart(fig, use_container_width=True, key="chart_pricing")
 
             with st.expander("🔎 Raw pricing JSON", expanded=False):
                 st.json(prices_json)
@@ -364,35 +785,30 @@ with tab_features:
     rows = (scores_json or {}).get("scores", [])
     if not rows:
         st.info("Run analysis to generate AI feature scores for the radar chart.")
+    elif not competitors_list or len(features_list) < 3:
+        # a radar needs 3+ spokes; don't build frames for a chart we won't draw
+        st.info("The radar chart needs at least 1 competitor and 3 features. Adjust the inputs in the sidebar.")
     else:
-        df_scores = pd.DataFrame(rows)
-        df_scores.columns = [c.strip().lower() for c in df_scores.columns]
+        scores_path, scores_stamp = prefer_parquet(outputs, SCORES_FILE)
+        df_scores = build_scores_df(
+            scores_path,
+            scores_stamp,
+            selected_products,
+            tuple(features_list),
+        )
 
         required = {"product", "feature", "score"}
         if not required.issubset(set(df_scores.columns)):
             st.error(f"feature_scores.json missing fields. Found: {list(df_scores.columns)}")
         else:
-            df_scores["score"] = pd.to_numeric(df_scores["score"], errors="coerce")
-            df_scores = df_scores.dropna(subset=["score"])
-
-            selected_products = [product_name] + competitors_list
-            df_scores = df_scores[df_scores["product"].isin(selected_products)]
-            df_scores = df_scores[df_scores["feature"].isin(features_list)]
-
             if df_scores.empty:
                 st.warning("No matching scores for your selected competitors/features. Try re-running analysis.")
             else:
-                fig_radar = px.line_polar(
-                    df_scores,
-                    r="score",
-                    theta="feature",
-                    color="product",
-                    line_close=True,
-                    title=f"Feature Comparison: {product_name} vs Selected Competitors",
-                    color_discrete_sequence=MM_PALETTE,
+                fig = fig_radar(
+                    tuple(df_scores[["product", "feature", "score"]].itertuples(index=False, name=None)),
+                    f"Feature Comparison: {product_name} vs Selected Competitors",
                 )
-                fig_radar.update_traces(fill="toself", opacity=0.55)
-                st.plotly_chart(fig_radar, use_container_width=True)
+                st.plotly_chart(fig, use_container_width=True, key="chart_radar")
 
     st.markdown("---")
     st.subheader("📄 Feature Comparison Report (table)")
@@ -411,23 +827,14 @@ with tab_growth:
     if not growth_json:
         st.info("Run analysis to generate product trend.")
     else:
-        years = growth_json.get("years", [])
-        growth = growth_json.get("growth_percent", [])
+        growth_path, growth_stamp = prefer_parquet(outputs, GROWTH_FILE)
+        df_growth = build_growth_df(growth_path, growth_stamp)
 
-        if not years or not growth or len(years) != len(growth):
+        if df_growth is None:
             st.warning("market_growth.json is incomplete.")
         else:
-            df_growth = pd.DataFrame({"Year": years, "Demand / Growth (%)": growth})
-            fig_growth = px.line(
-                df_growth,
-                x="Year",
-                y="Demand / Growth (%)",
-                markers=True,
-                title=f"{product_name} — Demand / Growth Trend ({geography})",
-                color_discrete_sequence=[MM_PALETTE[0]],
-            )
-            fig_growth.update_layout(xaxis=dict(type="category"))
-            st.plotly_chart(fig_growth, use_container_width=True)
+            fig = fig_growth(df_growth, f"{product_name} — Demand / Growth Trend ({geography})")
+            st.plotly_chart(fig, use_container_width=True, key="chart_growth")
 
             rationale = growth_json.get("rationale")
             if rationale:
@@ -441,31 +848,25 @@ with tab_reports:
     st.subheader("📘 Full Reports")
     st.caption("All markdown outputs generated by the pipeline.")
 
-    md_files = list_md_files()
+    md_files = list_md_files(outputs)
     if not md_files:
         st.info("No reports found yet. Run analysis first.")
     else:
         preferred_order = [
             "research_plan.md",
             "customer_analysis.md",
-            "review_sentiment.md",
-            "feature_comparison.md",
+            REVIEW_MD_FILE,
+            FEATURE_TABLE_MD_FILE,
             "final_market_strategy_report.md",
         ]
         ordered = [f for f in preferred_order if f in md_files] + [f for f in md_files if f not in preferred_order]
 
         for md_file in ordered:
-            content = safe_read_text(os.path.join(OUTPUT_DIR, md_file)) or ""
             with st.expander(f"📄 {md_file}", expanded=False):
-                st.markdown(content)
+                # per-file (path, stamp) cache keyed off the rerun's outputs snapshot
+                st.markdown(read_output_text(outputs, md_file) or "")
 
         st.markdown("---")
-        st.download_button(
-            "⬇️ Download outputs (ZIP)",
-            data=make_outputs_zip_bytes(),
-            file_name="marketmind_outputs.zip",
-            mime="application/zip",
-            use_container_width=True,
-        )
+        outputs_download_button("reports")
 
 
@@ -1,14 +1,20 @@
 import os
 import re
 import json
+import asyncio
 import logging
 import traceback
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable, AsyncIterator
 
 from crewai import Crew
 from agents import MarketResearchAgents
 from tasks import MarketResearchTasks
 
+try:
+    import orjson
+except ImportError:  # stdlib fallback; same output, slower
+    orjson = None
+
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(
     level=getattr(logging, LOG_LEVEL, logging.INFO),
@@ -27,10 +33,54 @@ def _safe_json_loads(text: str) -> Optional[dict]:
         return None
 
 
+def _task_json(task: Any) -> Optional[dict]:
+    """
+    Structured tasks (output_json=...) expose json_dict; str(output) is then a Python
+    repr, not JSON. Plain tasks fall back to parsing the raw text.
+    """
+    out = getattr(task, "output", None)
+    data = getattr(out, "json_dict", None)
+    if isinstance(data, dict):
+        return data
+    return _safe_json_loads(str(getattr(out, "raw", out) or ""))
+
+
 def _write_json(path: str, payload: dict) -> None:
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, indent=2)
+    if orjson is not None:
+        data = orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        data = json.dumps(
+            payload, indent=2, ensure_ascii=False, default=lambda o: o.tolist()
+        ).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _write_parquet(path: str, rows: List[dict], columns: Dict[str, str]) -> Optional[str]:
+    """
+    Typed columnar copy of a JSON artifact so the dashboard can skip the
+    json -> DataFrame -> to_numeric pipeline. Best-effort: skipped without pandas/pyarrow.
+    """
+    try:
+        import pandas as pd
+
+        # same key normalization as the dashboard's JSON path ("Product " -> "product")
+        records = [
+            {str(k).strip().lower(): v for k, v in r.items()}
+            for r in rows or []
+            if isinstance(r, dict)
+        ]
+        df = pd.DataFrame.from_records(records, columns=list(columns))
+        for col, dtype in columns.items():
+            if dtype.startswith("float"):
+                df[col] = pd.to_numeric(df[col], errors="coerce")
+            df[col] = df[col].astype(dtype)
+        df.to_parquet(path, index=False)
+        return path
+    except Exception as e:
+        logger.warning("Skipping parquet %s: %s", path, e)
+        return None
 
 
 def _normalize_price(val: Any) -> str:
@@ -109,6 +159,39 @@ def _normalize_sentiment_payload(payload: dict, product_name: str) -> dict:
     return payload
 
 
+async def _apply_local_sentiment(payload: dict, product_name: str) -> dict:
+    """
+    Replace the LLM-estimated percentages with counts from the local ONNX classifier
+    over the review sources the LLM cited. The LLM keeps the narrative (themes/quotes).
+    No-op when the exported model, the sources, or enough product-linked text is missing.
+    """
+    sources = payload.get("sources") if isinstance(payload, dict) else None
+    if not sources or not isinstance(sources, list):
+        return payload
+    try:
+        from tools import local_sentiment
+        from tools.scrape_pipeline import fetch_many, extract_main_content
+
+        if not local_sentiment.ready():
+            return payload
+        urls = [str(u) for u in sources if isinstance(u, str) and u.strip()]
+        docs = []
+        for u, fetched in zip(urls, await fetch_many(urls)):
+            if isinstance(fetched, Exception):
+                continue
+            final_url, html = fetched
+            docs.append({"url": final_url, "text": extract_main_content(final_url, html).get("text", "")})
+
+        local = local_sentiment.sentiment_from_sources(product_name, docs)
+        if local:
+            payload["sentiment"] = local["sentiment"]
+            payload["sentiment_method"] = "local_onnx"
+            payload["sentence_count"] = local["sentence_count"]
+    except Exception as e:
+        logger.warning("Local sentiment classifier skipped: %s", e)
+    return payload
+
+
 def feature_comparison_json_to_md(payload: dict) -> str:
     """
     Clean markdown table format (your “before format”).
@@ -238,6 +321,9 @@ def _write_review_sentiment_md(outputs_dir: str, payload: dict, show_themes: boo
     return path
 
 
+_MD_HEADER_RE = re.compile(r"^(#{2,6})\s+(.*)\s*$")
+
+
 def _remove_timeline_section(md_text: str) -> str:
     """
     Removes sections like:
@@ -253,7 +339,7 @@ def _remove_timeline_section(md_text: str) -> str:
     i = 0
     while i < len(lines):
         line = lines[i]
-        m = re.match(r"^(#{2,6})\s+(.*)\s*$", line.strip())
+        m = _MD_HEADER_RE.match(line.strip())
         if m:
             level = len(m.group(1))
             title = m.group(2).strip().lower()
@@ -262,7 +348,7 @@ def _remove_timeline_section(md_text: str) -> str:
                 i += 1
                 while i < len(lines):
                     nxt = lines[i]
-                    m2 = re.match(r"^(#{2,6})\s+.*\s*$", nxt.strip())
+                    m2 = _MD_HEADER_RE.match(nxt.strip())
                     if m2 and len(m2.group(1)) <= level:
                         break
                     i += 1
@@ -274,6 +360,57 @@ def _remove_timeline_section(md_text: str) -> str:
     return cleaned
 
 
+async def _akickoff(agents: List[Any], tasks: List[Any]) -> Any:
+    """
+    Run one crew stage without blocking the event loop.
+    Prefers native async kickoff; older CrewAI builds only ship the threaded kickoff_async.
+    """
+    crew = Crew(agents=agents, tasks=tasks, verbose=True)
+    akickoff = getattr(crew, "akickoff", None)
+    if akickoff is not None:
+        return await akickoff()
+    return await crew.kickoff_async()
+
+
+def _synthesis_messages(agent: Any, task: Any) -> List[Dict[str, str]]:
+    """Same prompt CrewAI would assemble for the synthesis task, for a direct streaming call."""
+    context = "\n\n----------\n\n".join(
+        str(t.output) for t in (getattr(task, "context", None) or []) if getattr(t, "output", None)
+    )
+    system = f"You are {agent.role}. {agent.backstory}\nYour personal goal is: {agent.goal}"
+    user = (
+        f"{task.description}\n\n"
+        f"This is the expected criteria for your final answer: {task.expected_output}\n\n"
+        f"This is the context you're working with:\n{context}"
+    )
+    return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+
+
+async def stream_final(agent: Any, task: Any) -> AsyncIterator[str]:
+    """Yield the final strategy report token-chunk by token-chunk."""
+    import litellm
+
+    # same model/settings the CrewAI path would use for this agent
+    llm = getattr(agent, "llm", None)
+    model = llm if isinstance(llm, str) else getattr(llm, "model", None)
+    params = {}
+    if llm is not None and not isinstance(llm, str):
+        for name in ("temperature", "base_url", "api_base", "api_key", "api_version"):
+            value = getattr(llm, name, None)
+            if value is not None:
+                params[name] = value
+    response = await litellm.acompletion(
+        model=model or os.getenv("OPENAI_MODEL_NAME", "gpt-4o-mini"),
+        messages=_synthesis_messages(agent, task),
+        stream=True,
+        **params,
+    )
+    async for chunk in response:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            yield delta
+
+
 # -------------------------
 # main entry
 # -------------------------
@@ -284,7 +421,39 @@ def run_analysis(
     scale: Optional[str] = None,
     competitors: Optional[List[str]] = None,
     features: Optional[List[str]] = None,
+    on_final_chunk: Optional[Callable[[str], None]] = None,
+    outputs_dir: str = "outputs",
+) -> Dict[str, Any]:
+    """Sync entrypoint (Streamlit / CLI). See arun_analysis."""
+    return asyncio.run(
+        arun_analysis(
+            product_name=product_name,
+            industry=industry,
+            geography=geography,
+            scale=scale,
+            competitors=competitors,
+            features=features,
+            on_final_chunk=on_final_chunk,
+            outputs_dir=outputs_dir,
+        )
+    )
+
+
+async def arun_analysis(
+    product_name: Optional[str] = None,
+    industry: Optional[str] = None,
+    geography: Optional[str] = None,
+    scale: Optional[str] = None,
+    competitors: Optional[List[str]] = None,
+    features: Optional[List[str]] = None,
+    on_final_chunk: Optional[Callable[[str], None]] = None,
+    outputs_dir: str = "outputs",
 ) -> Dict[str, Any]:
+    """
+    on_final_chunk: if given, the synthesis report is streamed and each text chunk is
+    passed to it as it arrives (called on the caller's thread).
+    outputs_dir: where artifacts are written (the dashboard passes a staging dir).
+    """
 
     product_name = (product_name or "EcoWave Smart Bottle").strip()
     industry = (industry or "Consumer Goods").strip()
@@ -336,34 +505,23 @@ def run_analysis(
             sentiment_agent, product_name, industry, sources=[]
         )
 
-        synthesis_task = tasks.synthesis_task(
-            synthesizer,
-            product_name,
-            industry,
-            [planning_task, pricing_task, feature_scores_task, growth_task, persona_task, review_task],
-        )
+        # Stage 1: plan. Stage 2: competitor / persona / review agents only depend on
+        # the plan, so they run concurrently. Stage 3: synthesis over everything.
+        for t in (pricing_task, feature_scores_task, growth_task, persona_task, review_task):
+            t.context = [planning_task]
 
-        crew = Crew(
-            agents=[consultant, competitor_agent, persona_agent, sentiment_agent, synthesizer],
-            tasks=[
-                planning_task,
-                pricing_task,
-                feature_scores_task,
-                growth_task,
-                persona_task,
-                review_task,
-                synthesis_task,
-            ],
-            verbose=True,
+        await _akickoff([consultant], [planning_task])
+        await asyncio.gather(
+            _akickoff([competitor_agent], [pricing_task, feature_scores_task, growth_task]),
+            _akickoff([persona_agent], [persona_task]),
+            _akickoff([sentiment_agent], [review_task]),
         )
-        crew.kickoff()
 
-        outputs_dir = "outputs"
         os.makedirs(outputs_dir, exist_ok=True)
         files_written: List[str] = []
 
         # ---- Pricing JSON ----
-        pricing_json = _safe_json_loads(str(getattr(pricing_task, "output", ""))) or {
+        pricing_json = _task_json(pricing_task) or {
             "product": product_name,
             "currency": "USD",
             "prices": [{"name": product_name, "price": None, "source": ""}],
@@ -372,6 +530,32 @@ def run_analysis(
         prices_path = os.path.join(outputs_dir, "competitor_prices.json")
         _write_json(prices_path, pricing_json)
         files_written.append(prices_path)
+        prices_pq = _write_parquet(
+            os.path.join(outputs_dir, "competitor_prices.parquet"),
+            pricing_json.get("prices", []),
+            {"name": "string", "price": "float32", "source": "string"},
+        )
+        if prices_pq:
+            files_written.append(prices_pq)
+
+        # ---- Sentiment (SINGLE SOURCE OF TRUTH) ----
+        # Finalized before synthesis so the report sees the same numbers as the chart.
+        raw_sentiment = _task_json(review_task) or {
+            "product": product_name,
+            "no_verified_sources": True,
+            "sentiment": {"positive": 60, "negative": 30, "neutral": 10},
+            "quotes": [],
+        }
+        raw_sentiment = await _apply_local_sentiment(raw_sentiment, product_name)
+        sentiment_payload = _normalize_sentiment_payload(raw_sentiment, product_name)
+
+        synthesis_task = tasks.synthesis_task(
+            synthesizer,
+            product_name,
+            industry,
+            [planning_task, pricing_task, feature_scores_task, growth_task, persona_task],
+            sentiment_json=sentiment_payload,
+        )
 
         # ---- Feature Comparison JSON task (with pricing_json) ----
         fc_task = tasks.feature_comparison_json_task(
@@ -382,10 +566,23 @@ def run_analysis(
             features,
             pricing_json,
         )
-        fc_crew = Crew(agents=[competitor_agent], tasks=[fc_task], verbose=True)
-        fc_crew.kickoff()
+        async def _synthesize() -> str:
+            if on_final_chunk is None:
+                await _akickoff([synthesizer], [synthesis_task])
+                return str(getattr(synthesis_task, "output", "") or "")
+            acc: List[str] = []
+            async for chunk in stream_final(synthesizer, synthesis_task):
+                acc.append(chunk)
+                on_final_chunk(chunk)
+            return "".join(acc)
+
+        # feature comparison and synthesis are independent of each other
+        _, final_report = await asyncio.gather(
+            _akickoff([competitor_agent], [fc_task]),
+            _synthesize(),
+        )
 
-        fc_payload = _safe_json_loads(str(getattr(fc_task, "output", ""))) or {
+        fc_payload = _task_json(fc_task) or {
             "title": f"Feature Comparison Report for {product_name}",
             "industry": industry,
             "summary": "Fallback feature comparison.",
@@ -400,7 +597,7 @@ def run_analysis(
         files_written.append(feature_md_path)
 
         # ---- Feature scores JSON ----
-        scores_json = _safe_json_loads(str(getattr(feature_scores_task, "output", ""))) or {
+        scores_json = _task_json(feature_scores_task) or {
             "product": product_name,
             "competitors": competitors,
             "features": features,
@@ -409,9 +606,16 @@ def run_analysis(
         scores_path = os.path.join(outputs_dir, "feature_scores.json")
         _write_json(scores_path, scores_json)
         files_written.append(scores_path)
+        scores_pq = _write_parquet(
+            os.path.join(outputs_dir, "feature_scores.parquet"),
+            scores_json.get("scores", []),
+            {"product": "string", "feature": "string", "score": "float32"},
+        )
+        if scores_pq:
+            files_written.append(scores_pq)
 
         # ---- Product demand / growth JSON ----
-        growth_json = _safe_json_loads(str(getattr(growth_task, "output", ""))) or {
+        growth_json = _task_json(growth_task) or {
             "product": product_name,
             "geography": geography,
             "years": ["2023", "2024", "2025", "2026"],
@@ -426,16 +630,18 @@ def run_analysis(
         growth_path = os.path.join(outputs_dir, "market_growth.json")
         _write_json(growth_path, growth_json)
         files_written.append(growth_path)
-
-        # ---- Sentiment (SINGLE SOURCE OF TRUTH) ----
-        raw_sentiment = _safe_json_loads(str(getattr(review_task, "output", ""))) or {
-            "product": product_name,
-            "no_verified_sources": True,
-            "sentiment": {"positive": 60, "negative": 30, "neutral": 10},
-            "quotes": [],
-        }
-        sentiment_payload = _normalize_sentiment_payload(raw_sentiment, product_name)
-
+        years = growth_json.get("years", []) or []
+        growth = growth_json.get("growth_percent", []) or []
+        if years and len(years) == len(growth):
+            growth_pq = _write_parquet(
+                os.path.join(outputs_dir, "market_growth.parquet"),
+                [{"year": str(y), "growth_percent": g} for y, g in zip(years, growth)],
+                {"year": "string", "growth_percent": "float32"},
+            )
+            if growth_pq:
+                files_written.append(growth_pq)
+
+        # ---- Sentiment artifacts (payload finalized above, before synthesis) ----
         sentiment_verified_path = os.path.join(outputs_dir, "sentiment_verified.json")
         _write_json(sentiment_verified_path, sentiment_payload)
         files_written.append(sentiment_verified_path)
@@ -453,7 +659,7 @@ def run_analysis(
         md_map = {
             "research_plan.md": research_plan_clean,
             "customer_analysis.md": str(getattr(persona_task, "output", "") or "").strip() + "\n",
-            "final_market_strategy_report.md": str(getattr(synthesis_task, "output", "") or "").strip() + "\n",
+            "final_market_strategy_report.md": final_report.strip() + "\n",
         }
         for name, content in md_map.items():
             path = os.path.join(outputs_dir, name)
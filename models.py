@@ -19,3 +19,29 @@ class CustomerPersona(BaseModel):
     motivations: str
     pain_points: str
     preferred_channels: List[str]
+
+# ---------------------------
+# Structured task outputs (one object per competitor / per product-feature pair)
+# ---------------------------
+class PriceEntry(BaseModel):
+    name: str
+    price: Optional[float] = None
+    source: str = ""
+
+class CompetitorPrices(BaseModel):
+    product: str
+    currency: str = "USD"
+    prices: List[PriceEntry]
+    notes: str = ""
+
+class FeatureScore(BaseModel):
+    product: str
+    feature: str
+    score: float
+    note: str = ""
+
+class FeatureScores(BaseModel):
+    product: str
+    competitors: List[str]
+    features: List[str]
+    scores: List[FeatureScore]
@@ -1,6 +1,13 @@
 # tasks.py
 from crewai import Task
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from models import CompetitorPrices, FeatureScores
+
+# Prompt layout: static instructions + JSON schema first, per-run inputs last.
+# For a given agent + task the prompt is then identical across runs/products up to
+# the trailing "Inputs" block, so provider-side prefix caching can reuse it when the
+# prompt is long enough to qualify.
 
 
 class MarketResearchTasks:
@@ -10,13 +17,16 @@ class MarketResearchTasks:
     def research_planning_task(self, agent, product_name: str, industry: str):
         return Task(
             description=(
-                f"Create a structured market research plan for '{product_name}' in the '{industry}' industry.\n"
+                "Create a structured market research plan for the product and industry below.\n"
                 "Output in markdown.\n\n"
                 "Rules:\n"
                 "- Do NOT invent numbers or citations.\n"
                 "- If you make assumptions, label them as assumptions.\n"
                 "- DO NOT include a timeline/roadmap/schedule section.\n"
-                "- Focus on objectives, research questions, methodology, sources, and deliverables.\n"
+                "- Focus on objectives, research questions, methodology, sources, and deliverables.\n\n"
+                "Inputs:\n"
+                f"Product: {product_name}\n"
+                f"Industry: {industry}\n"
             ),
             expected_output="Markdown research plan (no timeline section).",
             agent=agent,
@@ -32,14 +42,17 @@ class MarketResearchTasks:
     ):
         return Task(
             description=(
-                f"Create 3-5 customer personas for '{product_name}' in '{industry}'.\n"
-                f"Geography: {geography}\n"
-                f"Scale: {scale}\n\n"
+                "Create 3-5 customer personas for the product below.\n\n"
                 "IMPORTANT:\n"
                 "- Personas must include a short 'How derived' explanation.\n"
                 "- Include a 'Customization suggestions' section for how users can adjust personas.\n"
                 "- Do NOT invent hard facts. Keep plausible and label hypotheses.\n"
-                "Output in markdown."
+                "Output in markdown.\n\n"
+                "Inputs:\n"
+                f"Product: {product_name}\n"
+                f"Industry: {industry}\n"
+                f"Geography: {geography}\n"
+                f"Scale: {scale}\n"
             ),
             expected_output="Markdown personas with derivation + customization suggestions.",
             agent=agent,
@@ -54,11 +67,10 @@ class MarketResearchTasks:
         comps = competitors or []
         return Task(
             description=(
-                f"Find pricing for '{product_name}' and ONLY these competitors: {comps}\n"
-                f"Industry: {industry}\n\n"
+                "Find pricing for the product and ONLY the competitors listed under Inputs.\n\n"
                 "Return STRICT JSON ONLY (no markdown):\n"
                 "{\n"
-                f'  "product": "{product_name}",\n'
+                '  "product": "<product>",\n'
                 '  "currency": "USD",\n'
                 '  "prices": [\n'
                 '    {"name": "<name>", "price": <number|null>, "source": "<url|empty>"}\n'
@@ -67,11 +79,17 @@ class MarketResearchTasks:
                 "}\n\n"
                 "Rules:\n"
                 "- ONLY include the product + given competitors.\n"
+                "- Cover ALL of them in this single response (one object per name).\n"
                 "- If you cannot verify price, set price=null and source=\"\".\n"
-                "- Do NOT output placeholder random values.\n"
+                "- Do NOT output placeholder random values.\n\n"
+                "Inputs:\n"
+                f"Product: {product_name}\n"
+                f"Industry: {industry}\n"
+                f"Competitors: {comps}\n"
             ),
             expected_output="Strict JSON only.",
             agent=agent,
+            output_json=CompetitorPrices,
         )
 
     def feature_scores_json_task(
@@ -86,16 +104,12 @@ class MarketResearchTasks:
         feats = features or []
         return Task(
             description=(
-                f"Generate numeric feature scores (0-10) for a radar chart.\n"
-                f"Product: {product_name}\n"
-                f"Industry: {industry}\n"
-                f"Competitors: {comps}\n"
-                f"Features (use ONLY these): {feats}\n\n"
+                "Generate numeric feature scores (0-10) for a radar chart.\n\n"
                 "Return STRICT JSON ONLY:\n"
                 "{\n"
-                f'  "product": "{product_name}",\n'
-                f'  "competitors": {comps},\n'
-                f'  "features": {feats},\n'
+                '  "product": "<product>",\n'
+                '  "competitors": ["<competitor>", ...],\n'
+                '  "features": ["<feature>", ...],\n'
                 '  "scores": [\n'
                 '    {"product": "<name>", "feature": "<feature>", "score": 0, "note": ""}\n'
                 "  ]\n"
@@ -104,10 +118,16 @@ class MarketResearchTasks:
                 "- You MUST output rows for product_name AND EACH competitor.\n"
                 "- You MUST score EVERY feature for EVERY product.\n"
                 "- Do NOT invent new features.\n"
-                "- If not applicable, score 0 and note='Not applicable'.\n"
+                "- If not applicable, score 0 and note='Not applicable'.\n\n"
+                "Inputs:\n"
+                f"Product: {product_name}\n"
+                f"Industry: {industry}\n"
+                f"Competitors: {comps}\n"
+                f"Features (use ONLY these): {feats}\n"
             ),
             expected_output="Strict JSON only.",
             agent=agent,
+            output_json=FeatureScores,
         )
 
     def market_growth_json_task(
@@ -122,14 +142,10 @@ class MarketResearchTasks:
         return Task(
             description=(
                 "Estimate a PRODUCT-level demand trend (not generic industry CAGR).\n\n"
-                f"Product: {product_name}\n"
-                f"Industry context: {industry}\n"
-                f"Geography: {geography}\n"
-                f"Competitor context: {comps}\n\n"
                 "Return STRICT JSON ONLY:\n"
                 "{\n"
-                f'  "product": "{product_name}",\n'
-                f'  "geography": "{geography}",\n'
+                '  "product": "<product>",\n'
+                '  "geography": "<geography>",\n'
                 '  "years": ["2023","2024","2025","2026"],\n'
                 '  "growth_percent": [0,0,0,0],\n'
                 '  "rationale": "1–2 cautious lines; if unsure say low confidence"\n'
@@ -137,7 +153,12 @@ class MarketResearchTasks:
                 "Rules:\n"
                 "- growth_percent must be numeric.\n"
                 "- Do NOT invent citations.\n"
-                "- Be conservative.\n"
+                "- Be conservative.\n\n"
+                "Inputs:\n"
+                f"Product: {product_name}\n"
+                f"Industry context: {industry}\n"
+                f"Geography: {geography}\n"
+                f"Competitor context: {comps}\n"
             ),
             expected_output="Strict JSON only.",
             agent=agent,
@@ -151,10 +172,10 @@ class MarketResearchTasks:
         """
         return Task(
             description=(
-                f"Analyze brand sentiment for '{product_name}' in '{industry}'.\n\n"
+                "Analyze brand sentiment for the product below.\n\n"
                 "Return STRICT JSON ONLY:\n"
                 "{\n"
-                f'  "product": "{product_name}",\n'
+                '  "product": "<product>",\n'
                 '  "no_verified_sources": true,\n'
                 '  "sentiment": {"positive": 0, "negative": 0, "neutral": 0},\n'
                 '  "themes": {"positive": [], "negative": [], "neutral": []},\n'
@@ -167,7 +188,10 @@ class MarketResearchTasks:
                 "- Do NOT create quotes unless you have verified sources.\n"
                 "- If you do not have sources: no_verified_sources=true, quotes=[], sources=[]\n"
                 "- Percentages should sum to ~100.\n"
-                "- Themes must match the product category.\n"
+                "- Themes must match the product category.\n\n"
+                "Inputs:\n"
+                f"Product: {product_name}\n"
+                f"Industry: {industry}\n"
             ),
             expected_output="Strict JSON only.",
             agent=agent,
@@ -201,14 +225,18 @@ class MarketResearchTasks:
 
         return Task(
             description=(
-                f"Build a feature comparison for '{product_name}' in '{industry}'.\n"
-                f"Competitors: {comps}\n"
-                f"Features: {feats}\n\n"
+                "Build a feature comparison for the product and competitors under Inputs.\n\n"
                 "CRITICAL RULES:\n"
                 "- Use ONLY the provided features. Do NOT add/substitute features.\n"
                 "- If a feature doesn't apply, output 'N/A'.\n"
                 "- Keep language consistent with the category.\n"
-                "- If the feature is Price/Pricing, use pricing_json values.\n\n"
+                "- If the feature is Price/Pricing, use pricing_json values.\n"
+                "- Use the real product/competitor names as keys, exactly as in the schema below.\n\n"
+                "Inputs:\n"
+                f"Product: {product_name}\n"
+                f"Industry: {industry}\n"
+                f"Competitors: {comps}\n"
+                f"Features: {feats}\n\n"
                 f"pricing_json:\n{pricing_json}\n\n"
                 "Return STRICT JSON ONLY:\n"
                 "{\n"
@@ -232,16 +260,30 @@ class MarketResearchTasks:
     # ---------------------------
     # Final Synthesis (Markdown)
     # ---------------------------
-    def synthesis_task(self, agent, product_name: str, industry: str, context_tasks: List[Task]):
+    def synthesis_task(
+        self,
+        agent,
+        product_name: str,
+        industry: str,
+        context_tasks: List[Task],
+        sentiment_json: Optional[dict] = None,
+    ):
+        # sentiment_json is the normalized payload written to sentiment_verified.json,
+        # passed inline so the report quotes the same numbers as the dashboard
+        sentiment_block = f"\nsentiment_json:\n{sentiment_json}\n" if sentiment_json else ""
         return Task(
             description=(
-                f"Synthesize prior outputs into a final strategy report for '{product_name}' in '{industry}'.\n\n"
+                "Synthesize prior outputs into a final strategy report for the product below.\n\n"
                 "Rules:\n"
                 "- Do NOT include an implementation timeline unless user explicitly requested it.\n"
                 "- Do NOT include budgets unless user explicitly provided a budget range.\n"
                 "- Any claims about sentiment must match the sentiment JSON.\n"
                 "- If no_verified_sources=true, explicitly state sentiment is not source-verified.\n"
-                "Output in markdown."
+                "Output in markdown.\n\n"
+                "Inputs:\n"
+                f"Product: {product_name}\n"
+                f"Industry: {industry}\n"
+                f"{sentiment_block}"
             ),
             expected_output="Final markdown strategy report.",
             agent=agent,
@@ -0,0 +1,22 @@
+# tools/__init__.py
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def get_tool(name: str):
+    """
+    Process-wide tool singletons ("search", "scrape", "fallback", "file").
+    Imported lazily so a broken optional dependency only disables tools, not the app.
+    """
+    try:
+        from tools.scrape_pipeline import WebSearchTool, WebScrapeTool, FallbackSearchTool, FileReadTool
+    except Exception:
+        return None
+
+    tool_cls = {
+        "search": WebSearchTool,
+        "scrape": WebScrapeTool,
+        "fallback": FallbackSearchTool,
+        "file": FileReadTool,
+    }.get(name)
+    return tool_cls() if tool_cls else None
@@ -0,0 +1,21 @@
+# tools/http.py
+import os
+import atexit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# One pooled session for every search/scrape tool: keep-alive connections are reused
+# across calls instead of paying a fresh TCP + TLS handshake per request.
+USER_AGENT = os.getenv("SCRAPER_USER_AGENT", "MarketMindBot/1.0 (+https://example.com/bot)")
+
+_retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+_adapter = HTTPAdapter(pool_connections=20, pool_maxsize=50, max_retries=_retry)
+
+SESSION = requests.Session()
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+SESSION.headers.update({"User-Agent": USER_AGENT})
+
+atexit.register(SESSION.close)
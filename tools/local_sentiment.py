@@ -0,0 +1,149 @@
+# tools/local_sentiment.py
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+# Optional deps: without them callers keep the LLM-estimated sentiment.
+try:
+    import numpy as np
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+except Exception:
+    np = None
+    ORTModelForSequenceClassification = ORTQuantizer = AutoQuantizationConfig = AutoTokenizer = None
+
+# =========================
+# CONFIGURATION
+# =========================
+LOCAL_SENTIMENT_MODEL = os.getenv("LOCAL_SENTIMENT_MODEL", "distilbert-base-uncased-finetuned-sst-2-english")
+LOCAL_SENTIMENT_DIR = os.getenv("LOCAL_SENTIMENT_DIR", os.path.join("cache", "onnx-sst2-int8"))
+# SST-2 is binary; predictions less confident than this count as neutral
+NEUTRAL_CONFIDENCE = float(os.getenv("LOCAL_SENTIMENT_NEUTRAL_CONFIDENCE", "0.75"))
+BATCH_SIZE = int(os.getenv("LOCAL_SENTIMENT_BATCH_SIZE", "64"))
+MIN_SENTENCES = 8
+
+_QUANTIZED_FILE = "model_quantized.onnx"
+_MODEL = None
+_TOKENIZER = None
+_FAILED = False  # a failed export/load is not retried for the life of the process
+_LOCK = threading.Lock()
+
+
+# =========================
+# MODEL
+# =========================
+def available() -> bool:
+    return ORTModelForSequenceClassification is not None
+
+
+def _exported() -> bool:
+    return os.path.exists(os.path.join(LOCAL_SENTIMENT_DIR, _QUANTIZED_FILE))
+
+
+def ready() -> bool:
+    """True when classification can run now without exporting the model first."""
+    return available() and not _FAILED and (_MODEL is not None or _exported())
+
+
+def _export_quantized() -> None:
+    """One-time ONNX export + dynamic int8 quantization (VNNI kernels on modern x86)."""
+    model = ORTModelForSequenceClassification.from_pretrained(LOCAL_SENTIMENT_MODEL, export=True)
+    quantizer = ORTQuantizer.from_pretrained(model)
+    qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    quantizer.quantize(save_dir=LOCAL_SENTIMENT_DIR, quantization_config=qconfig)
+    AutoTokenizer.from_pretrained(LOCAL_SENTIMENT_MODEL).save_pretrained(LOCAL_SENTIMENT_DIR)
+
+
+def _load(allow_export: bool = False):
+    """
+    Load the quantized model. The export (download + ONNX + quantize, minutes) only runs
+    when allow_export is set, i.e. from the build step below; at runtime an un-exported
+    model just means callers keep the LLM sentiment.
+    """
+    global _MODEL, _TOKENIZER, _FAILED
+    if not available() or _FAILED:
+        return None, None
+    if _MODEL is None and not allow_export and not _exported():
+        return None, None
+    with _LOCK:
+        if _MODEL is None and not _FAILED:
+            try:
+                if not _exported():
+                    _export_quantized()
+                _MODEL = ORTModelForSequenceClassification.from_pretrained(
+                    LOCAL_SENTIMENT_DIR, file_name=_QUANTIZED_FILE, provider="CPUExecutionProvider"
+                )
+                _TOKENIZER = AutoTokenizer.from_pretrained(LOCAL_SENTIMENT_DIR)
+            except Exception:
+                _MODEL = _TOKENIZER = None
+                _FAILED = True
+    return _MODEL, _TOKENIZER
+
+
+# =========================
+# CLASSIFICATION
+# =========================
+def classify_texts(texts: List[str]) -> Optional[Dict[str, int]]:
+    """Return positive/negative/neutral counts, or None if the local model is unavailable."""
+    model, tokenizer = _load()
+    if model is None:
+        return None
+
+    labels = {i: str(l).lower() for i, l in model.config.id2label.items()}
+    counts = {"positive": 0, "negative": 0, "neutral": 0}
+    for start in range(0, len(texts), BATCH_SIZE):
+        batch = texts[start:start + BATCH_SIZE]
+        enc = tokenizer(batch, padding=True, truncation=True, max_length=256, return_tensors="np")
+        logits = np.asarray(model(**enc).logits, dtype="float32")
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        for p in probs:
+            top = int(p.argmax())
+            if p[top] < NEUTRAL_CONFIDENCE:
+                counts["neutral"] += 1
+            elif labels.get(top, "").startswith("pos"):
+                counts["positive"] += 1
+            else:
+                counts["negative"] += 1
+    return counts
+
+
+def sentiment_from_sources(product_name: str, sources: List[Dict[str, Any]]) -> Optional[dict]:
+    """
+    sources: list of {"url":..., "text":...}
+    Classifies product-linked sentences locally. Returns None when the model is
+    unavailable or there are too few sentences to be meaningful.
+    """
+    if not ready():
+        return None
+    from tools.review_scraper import _normalize_product_tokens, _split_sentences, _mentions_product
+
+    tokens = _normalize_product_tokens(product_name)
+    sentences = [
+        sent
+        for src in sources
+        for sent in _split_sentences(src.get("text", "") or "")
+        if _mentions_product(sent, tokens)
+    ]
+    if len(sentences) < MIN_SENTENCES:
+        return None
+
+    counts = classify_texts(sentences)
+    if counts is None:
+        return None
+
+    total = sum(counts.values())
+    pos = round(counts["positive"] * 100 / total)
+    neg = round(counts["negative"] * 100 / total)
+    return {
+        "sentiment": {"positive": pos, "negative": neg, "neutral": 100 - pos - neg},
+        "counts": counts,
+        "sentence_count": total,
+    }
+
+
+if __name__ == "__main__":
+    # build/deploy step: `python -m tools.local_sentiment` exports the int8 model ahead of time
+    _load(allow_export=True)
@@ -12,9 +12,14 @@ _STOPWORDS = {
     "very","really","too","also"
 }
 
+_NON_ALNUM_RE = re.compile(r"[^a-zA-Z0-9\s]")
+_WS_RE = re.compile(r"\s+")
+_SENT_SPLIT_RE = re.compile(r"(?<=[\.\!\?])\s+")
+_WORD_RE = re.compile(r"[a-zA-Z]{3,}")
+
 def _normalize_product_tokens(product_name: str) -> List[str]:
     # break into useful tokens: "Lao Gan Ma Chili Crisp" -> ["lao","gan","ma","chili","crisp","laoganma"]
-    base = re.sub(r"[^a-zA-Z0-9\s]", " ", product_name.lower()).split()
+    base = _NON_ALNUM_RE.sub(" ", product_name.lower()).split()
     joined = "".join(base)
     tokens = [t for t in base if len(t) >= 3]
     if len(joined) >= 5:
@@ -24,10 +29,10 @@ def _normalize_product_tokens(product_name: str) -> List[str]:
 
 def _split_sentences(text: str) -> List[str]:
     # lightweight sentence split (no extra deps)
-    text = re.sub(r"\s+", " ", text).strip()
+    text = _WS_RE.sub(" ", text).strip()
     if not text:
         return []
-    parts = re.split(r"(?<=[\.\!\?])\s+", text)
+    parts = _SENT_SPLIT_RE.split(text)
     return [p.strip() for p in parts if len(p.strip()) >= 20]
 
 
@@ -41,7 +46,7 @@ def _extract_keywords(sentences: List[str], top_k: int = 6) -> List[str]:
     words = []
     for s in sentences:
         # words only
-        ws = re.findall(r"[a-zA-Z]{3,}", s.lower())
+        ws = _WORD_RE.findall(s.lower())
         ws = [w for w in ws if w not in _STOPWORDS]
         words.extend(ws)
     counts = Counter(words)
@@ -2,7 +2,12 @@ import os
 import re
 import json
 import time
+import asyncio
 import hashlib
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Union
+
 import httpx
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
@@ -12,9 +17,16 @@ from readability import Document
 import trafilatura
 import urllib.robotparser as robotparser
 
+try:
+    from rank_bm25 import BM25Okapi
+except Exception:
+    BM25Okapi = None
+
 # CrewAI BaseTool
 from crewai.tools import BaseTool
 
+from tools.http import SESSION
+
 # -------------------------
 # Back-compat shim:
 # Older/newer CrewAI builds sometimes expect `.to_tool()`.
@@ -33,6 +45,10 @@ UA_DEFAULT = os.getenv("SCRAPER_USER_AGENT", "MarketMindBot/1.0 (+https://exampl
 CACHE_DIR = os.getenv("SCRAPER_CACHE_DIR", ".cache")
 TIMEOUT = int(os.getenv("SCRAPER_TIMEOUT_SECS", "20"))
 RESPECT_ROBOTS = os.getenv("SCRAPER_RESPECT_ROBOTS", "true").lower() == "true"
+FETCH_CONCURRENCY = int(os.getenv("SCRAPER_CONCURRENCY", "10"))
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+# Sentences of page text handed to the agent per URL (0 = no cap)
+MAX_SENTENCES = int(os.getenv("SCRAPER_MAX_SENTENCES", "40"))
 
 os.makedirs(CACHE_DIR, exist_ok=True)
 
@@ -54,8 +70,33 @@ def _load_cache(url: str):
             return json.load(f)
     return None
 
+_WS = re.compile(r"\s+")
+
 def _clean_text(txt: str) -> str:
-    return re.sub(r"\s+", " ", (txt or "").strip())
+    return _WS.sub(" ", (txt or "").strip())
+
+_SENT_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_TOKEN = re.compile(r"\w+")
+
+def _tokenize(txt: str) -> list:
+    return _TOKEN.findall(txt.lower())
+
+def condense_text(text: str, query: str = "", k: int = MAX_SENTENCES) -> str:
+    """
+    Keep the k sentences most relevant to query (BM25), in page order.
+    Without a query or rank_bm25, keep the leading k sentences.
+    """
+    if not text or k <= 0:
+        return text
+    sentences = [s for s in _SENT_SPLIT.split(text) if s.strip()]
+    if len(sentences) <= k:
+        return text
+    q_tokens = _tokenize(query)
+    if BM25Okapi is None or not q_tokens:
+        return " ".join(sentences[:k])
+    scores = BM25Okapi([_tokenize(s) for s in sentences]).get_scores(q_tokens)
+    top = sorted(sorted(range(len(sentences)), key=lambda i: -scores[i])[:k])
+    return " ".join(sentences[i] for i in top)
 
 def _is_probably_article(html: str) -> bool:
     score = html.count("") + html.count("schema.org/Article")
@@ -100,17 +141,65 @@ def _fetch(url: str) -> tuple[str, str]:
 
     headers = {"User-Agent": UA_DEFAULT, "Accept": "text/html,application/xhtml+xml"}
     try:
-        with httpx.Client(follow_redirects=True, timeout=TIMEOUT, headers=headers) as client:
-            r = client.get(url)
-            if r.status_code >= 400:
-                raise FetchError(f"HTTP {r.status_code}")
-            html = r.text
-            final_url = str(r.url)
-            _save_cache(url, {"final_url": final_url, "html": html})
-            return final_url, html
+        r = SESSION.get(url, headers=headers, timeout=TIMEOUT, allow_redirects=True)
+        if r.status_code >= 400:
+            raise FetchError(f"HTTP {r.status_code}")
+        html = r.text
+        final_url = str(r.url)
+        _save_cache(url, {"final_url": final_url, "html": html})
+        return final_url, html
     except Exception as e:
         raise FetchError(str(e))
 
+async def _fetch_one(client: httpx.AsyncClient, sem: asyncio.Semaphore, url: str) -> tuple[str, str]:
+    if not url.lower().startswith(("http://", "https://")):
+        raise FetchError("Invalid URL scheme")
+
+    if not await asyncio.to_thread(_respect_robots, url):
+        raise FetchError("Blocked by robots.txt")
+
+    cached = _load_cache(url)
+    if cached:
+        return cached.get("final_url", url), cached.get("html", "")
+
+    try:
+        async with sem:
+            r = await client.get(url)
+    except Exception as e:
+        raise FetchError(str(e))
+    if r.status_code >= 400:
+        raise FetchError(f"HTTP {r.status_code}")
+    html = r.text
+    final_url = str(r.url)
+    _save_cache(url, {"final_url": final_url, "html": html})
+    return final_url, html
+
+async def fetch_many(urls: List[str]) -> list:
+    """
+    Fetch many URLs concurrently (bounded by SCRAPER_CONCURRENCY per run).
+    Returns one (final_url, html) tuple per input, or the exception raised for that URL.
+    """
+    headers = {"User-Agent": UA_DEFAULT, "Accept": "text/html,application/xhtml+xml"}
+    limits = httpx.Limits(max_keepalive_connections=20, max_connections=FETCH_CONCURRENCY * 2)
+    sem = asyncio.Semaphore(FETCH_CONCURRENCY)
+    async with httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        follow_redirects=True,
+        timeout=TIMEOUT,
+        headers=headers,
+        limits=limits,
+    ) as client:
+        return await asyncio.gather(*(_fetch_one(client, sem, u) for u in urls), return_exceptions=True)
+
+def fetch_many_sync(urls: List[str]) -> list:
+    """Sync facade for CrewAI tools; safe to call from inside a running event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(fetch_many(urls))
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        return ex.submit(asyncio.run, fetch_many(urls)).result()
+
 # =========================
 # EXTRACTION
 # =========================
@@ -188,12 +277,11 @@ class WebSearchTool(BaseTool):
         api_key = os.getenv("SERPER_API_KEY", "")
         if not api_key:
             return json.dumps({"results": []})
-        import requests
         try:
             url = "https://google.serper.dev/search"
             headers = {"X-API-KEY": api_key, "Content-Type": "application/json"}
             payload = {"q": query, "num": 10}
-            r = requests.post(url, json=payload, headers=headers, timeout=15)
+            r = SESSION.post(url, json=payload, headers=headers, timeout=15)
             data = r.json()
             out = [
                 {
@@ -209,12 +297,32 @@ class WebSearchTool(BaseTool):
 
 class WebScrapeTool(BaseTool):
     name: str = "web_scrape"
-    description: str = "Scrape a webpage and return title, text, language, and links JSON."
+    description: str = (
+        "Scrape a webpage and return title, text, language, and links JSON. "
+        "Pass a list of URLs to scrape them concurrently. "
+        "Pass query (what you are looking for) to keep only the most relevant sentences."
+    )
+
+    def _run(self, url: Union[str, List[str]], query: str = "") -> str:
+        if isinstance(url, list):
+            results = []
+            for u, fetched in zip(url, fetch_many_sync(url)):
+                if isinstance(fetched, Exception):
+                    results.append({"url": u, "error": str(fetched)})
+                    continue
+                final_url, html = fetched
+                data = extract_main_content(final_url, html)
+                data["url"] = final_url
+                results.append(data)
+            for r in results:
+                if "text" in r:
+                    r["text"] = condense_text(r["text"], query)
+            return json.dumps({"results": results}, ensure_ascii=False)
 
-    def _run(self, url: str) -> str:
         final_url, html = _fetch(url)
         data = extract_main_content(final_url, html)
         data["url"] = final_url
+        data["text"] = condense_text(data["text"], query)
         return json.dumps(data, ensure_ascii=False)
 
 class FallbackSearchTool(BaseTool):
@@ -225,7 +333,7 @@ class FallbackSearchTool(BaseTool):
         try:
             ddg = "https://duckduckgo.com/html/"
             headers = {"User-Agent": UA_DEFAULT}
-            resp = httpx.get(ddg, params={"q": query}, headers=headers, timeout=TIMEOUT)
+            resp = SESSION.get(ddg, params={"q": query}, headers=headers, timeout=TIMEOUT)
             soup = BeautifulSoup(resp.text, "lxml")
             results = []
             for r in soup.select(".result__body")[:10]:
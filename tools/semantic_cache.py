@@ -0,0 +1,228 @@
+# tools/semantic_cache.py
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+import importlib.util
+from typing import List, Optional
+
+# Optional deps: without them the cache is simply disabled (every lookup misses).
+# sentence_transformers (torch) and faiss are imported lazily on first use, so
+# importing this module stays cheap on the app's startup path.
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+_HAS_SENTENCE_TRANSFORMERS = importlib.util.find_spec("sentence_transformers") is not None
+
+# =========================
+# CONFIGURATION
+# =========================
+SEMANTIC_CACHE_DIR = os.getenv("SEMANTIC_CACHE_DIR", os.path.join("cache", "semantic"))
+SEMANTIC_CACHE_MODEL = os.getenv("SEMANTIC_CACHE_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.87"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "500"))
+
+_MODEL = None
+_MODEL_LOCK = threading.Lock()
+
+
+# =========================
+# HELPERS
+# =========================
+def canonical_key(product_name: str, industry: str) -> str:
+    """Free-text part of a request; the only part compared by embedding similarity."""
+    return f"{product_name.strip()}|{industry.strip()}"
+
+
+def exact_fields(
+    geography: str,
+    scale: str,
+    competitors: List[str],
+    features: List[str],
+) -> dict:
+    """
+    Parts of a request that must match exactly: they differ by only a few tokens
+    ("US" vs "UK", one swapped competitor), so embeddings would score them as near-identical.
+    """
+    return {
+        "geography": geography.strip(),
+        "scale": scale.strip(),
+        "competitors": sorted(c.strip() for c in competitors or []),
+        "features": sorted(f.strip() for f in features or []),
+    }
+
+
+def _load_model():
+    global _MODEL
+    if not _HAS_SENTENCE_TRANSFORMERS:
+        return None
+    with _MODEL_LOCK:
+        if _MODEL is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+
+                _MODEL = SentenceTransformer(SEMANTIC_CACHE_MODEL)
+            except Exception:
+                return None
+    return _MODEL
+
+
+def _embed(text: str):
+    model = _load_model()
+    if model is None:
+        return None
+    vec = model.encode([text], normalize_embeddings=True)
+    return np.asarray(vec, dtype="float32")
+
+
+# =========================
+# CACHE
+# =========================
+class SemanticCache:
+    """
+    Maps near-identical analysis requests to a stored copy of their output artifacts.
+
+    Entries are (embedding, exact fields, artifact_dir); lookups run an inner-product search over
+    normalized embeddings (cosine similarity) of product + industry, accept only entries whose
+    exact fields match, and evict least-recently-used entries past max_entries.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = SEMANTIC_CACHE_DIR,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+    ):
+        self.cache_dir = cache_dir
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: List[dict] = []
+        self._vectors = None
+        self._index = None
+        self._load()
+
+    @property
+    def enabled(self) -> bool:
+        return np is not None and _HAS_SENTENCE_TRANSFORMERS
+
+    # ---- persistence ----
+    def _manifest_path(self) -> str:
+        return os.path.join(self.cache_dir, "index.json")
+
+    def _vectors_path(self) -> str:
+        return os.path.join(self.cache_dir, "embeddings.npy")
+
+    def _load(self) -> None:
+        if not self.enabled:
+            return
+        try:
+            with open(self._manifest_path(), "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            vectors = np.load(self._vectors_path())
+            if len(entries) == len(vectors):
+                self._entries = entries
+                self._vectors = vectors.astype("float32")
+        except Exception:
+            self._entries, self._vectors = [], None
+        self._rebuild_index()
+
+    def _save(self) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self._manifest_path(), "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, indent=2)
+        if self._vectors is not None:
+            np.save(self._vectors_path(), self._vectors)
+
+    def _rebuild_index(self) -> None:
+        self._index = None
+        if self._vectors is None or not len(self._vectors):
+            return
+        try:
+            import faiss
+        except Exception:
+            return  # numpy search fallback
+        index = faiss.IndexFlatIP(self._vectors.shape[1])
+        index.add(self._vectors)
+        self._index = index
+
+    # ---- search ----
+    def _candidates(self, q):
+        """(entry index, score) pairs in descending similarity."""
+        if self._vectors is None or not len(self._vectors):
+            return []
+        if self._index is not None:
+            scores, ids = self._index.search(q, len(self._vectors))
+            return [(int(i), float(s)) for i, s in zip(ids[0], scores[0]) if i >= 0]
+        sims = self._vectors @ q[0]
+        return [(int(i), float(sims[i])) for i in np.argsort(-sims)]
+
+    def lookup(self, key: str, exact: Optional[dict] = None) -> Optional[str]:
+        """
+        Return the artifact dir of the closest cached request if similarity >= threshold
+        and every field in `exact` (see exact_fields) matches the stored request.
+        """
+        if not self.enabled:
+            return None
+        q = _embed(key)
+        if q is None:
+            return None
+        exact = exact or {}
+        with self._lock:
+            for i, score in self._candidates(q):
+                if score < self.threshold:
+                    return None
+                entry = self._entries[i]
+                if entry.get("exact") != exact or not os.path.isdir(entry["dir"]):
+                    continue
+                entry["last_used"] = time.time()
+                self._save()
+                return entry["dir"]
+        return None
+
+    def store(self, key: str, source_dir: str, exact: Optional[dict] = None) -> Optional[str]:
+        """Copy source_dir into the cache and index it under key + exact fields."""
+        if not self.enabled or not os.path.isdir(source_dir):
+            return None
+        q = _embed(key)
+        if q is None:
+            return None
+        exact = exact or {}
+
+        ident = json.dumps([key, exact], sort_keys=True)
+        digest = hashlib.sha256(ident.encode("utf-8")).hexdigest()[:16]
+        artifact_dir = os.path.join(self.cache_dir, "artifacts", digest)
+        shutil.copytree(source_dir, artifact_dir, dirs_exist_ok=True)
+
+        with self._lock:
+            # same request stored again: refresh in place
+            for entry in self._entries:
+                if entry["key"] == key and entry.get("exact") == exact:
+                    entry["last_used"] = time.time()
+                    self._save()
+                    return artifact_dir
+
+            self._entries.append(
+                {"key": key, "dir": artifact_dir, "exact": exact, "last_used": time.time()}
+            )
+            self._vectors = q if self._vectors is None else np.vstack([self._vectors, q])
+            self._evict()
+            self._rebuild_index()
+            self._save()
+        return artifact_dir
+
+    def _evict(self) -> None:
+        overflow = len(self._entries) - self.max_entries
+        if overflow <= 0:
+            return
+        order = sorted(range(len(self._entries)), key=lambda i: self._entries[i].get("last_used", 0))
+        drop = set(order[:overflow])
+        for i in drop:
+            shutil.rmtree(self._entries[i]["dir"], ignore_errors=True)
+        keep = [i for i in range(len(self._entries)) if i not in drop]
+        self._entries = [self._entries[i] for i in keep]
+        self._vectors = self._vectors[keep]